@@ -0,0 +1,107 @@
+"""
+The hot loops working on the flat (structure of arrays) description of a TertiaryStructure.
+They only handle numbers, the Python objects (BasePair,...) are built by the callers (see pyrna.model).
+"""
+
+from collections import defaultdict
+from itertools import product
+import math
+
+#residue type codes
+RESIDUE_A, RESIDUE_U, RESIDUE_G, RESIDUE_C = 0, 1, 2, 3
+
+#atom role codes
+NO_ROLE, DONOR, ACCEPTOR = 0, 1, 2
+
+#the canonical pairings (A-U, G-C and G-U) indexed by two residue type codes
+CANONICAL_PAIRINGS = (
+    (False, True, False, False),
+    (True, False, True, False),
+    (False, True, False, True),
+    (False, False, True, False)
+)
+
+#the offsets of a grid cell and of its 26 neighbors
+_NEIGHBOR_CELLS = tuple(product((-1, 0, 1), repeat = 3))
+
+def build_grid(xyz, indices, cell):
+    """
+    Bin atoms into a uniform 3D grid.
+
+    Parameters:
+    ---------
+    - xyz: the x, y and z coordinates of each atom, one after the other
+    - indices: the indices of the atoms to bin
+    - cell: the size of a grid cell
+
+    Returns:
+    ------
+    a defaultdict (x cell, y cell, z cell) -> list of atom indices. Use get() to probe a cell without creating it.
+    """
+    grid = defaultdict(list)
+    for i in indices:
+        grid[(math.floor(xyz[3*i]/cell), math.floor(xyz[3*i+1]/cell), math.floor(xyz[3*i+2]/cell))].append(i)
+    return grid
+
+def scan_pairs(xyz, res_idx, res_type, role, cutoff2):
+    """
+    Find the donor/acceptor atoms closer than a cutoff and belonging to two residues able to make a canonical pairing.
+    The acceptors are binned into a grid whose cells have the size of the cutoff, so that each donor is only compared with the acceptors of its cell and of the 26 neighboring ones.
+
+    Parameters:
+    ---------
+    - xyz: the x, y and z coordinates of each atom, one after the other
+    - res_idx: the residue index of each atom
+    - res_type: the residue type code of each atom
+    - role: the role code of each atom
+    - cutoff2: the squared cutoff distance
+
+    Returns:
+    ------
+    a list of tuples (donor index, acceptor index)
+    """
+    cutoff = math.sqrt(cutoff2)
+    grid = build_grid(xyz, [j for j in range(len(role)) if role[j] == ACCEPTOR], cutoff)
+    pairs = []
+    for i in range(len(role)):
+        if role[i] != DONOR:
+            continue
+        x, y, z = xyz[3*i], xyz[3*i+1], xyz[3*i+2]
+        cx, cy, cz = math.floor(x/cutoff), math.floor(y/cutoff), math.floor(z/cutoff)
+        pairings = CANONICAL_PAIRINGS[res_type[i]]
+        for ox, oy, oz in _NEIGHBOR_CELLS:
+            for j in grid.get((cx+ox, cy+oy, cz+oz), ()):
+                if not pairings[res_type[j]] or res_idx[i] == res_idx[j]:
+                    continue
+                dx, dy, dz = xyz[3*j]-x, xyz[3*j+1]-y, xyz[3*j+2]-z
+                if dx*dx+dy*dy+dz*dz <= cutoff2:
+                    pairs.append((i, j))
+    return pairs
+
+#closing bracket -> opening bracket
+_CLOSING_BRACKETS = {')': '(', '}': '{', ']': '['}
+
+def pair_brackets(bn):
+    """
+    Pair the brackets of a bracket notation. The function supports characters like '(', ')', '[', ']', '{' and '}'
+
+    Parameters:
+    ---------
+    - bn: the bracket notation as a String
+
+    Returns:
+    ------
+    a list of tuples (opening position, closing position), the positions starting at 1, in the order of the closing brackets
+    """
+    stacks = {'(': [], '{': [], '[': []} #one stack of opened positions per bracket type
+    pairs = []
+    for i, s in enumerate(bn, 1):
+        if s == '.':
+            continue
+        if s in stacks:
+            stacks[s].append(i)
+        else:
+            opening = _CLOSING_BRACKETS.get(s)
+            if opening:
+                pairs.append((stacks[opening].pop(), i))
+    return pairs
@@ -1,7 +1,83 @@
-from urllib.request import urlopen
+import os, gzip, functools, tempfile
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import urlopen, Request
 from pyrna.model import SecondaryStructure, SecondaryStructureProvider, SecondaryStructureProviderParams
 from pyrna.parsers import parse_pdb
 
+#where PyRNA caches its downloads (can be changed with the PYRNA_CACHE_DIR environment variable)
+CACHE_DIR = os.environ.get("PYRNA_CACHE_DIR") or os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "pyrna")
+#where the downloaded PDB entries are stored
+PDB_CACHE_DIR = os.path.join(CACHE_DIR, "pdb")
+
+@functools.lru_cache(maxsize=128)
+def _fetch_pdb(pdb_id):
+    """
+    Download a PDB entry. The entries downloaded are stored on disk (see PDB_CACHE_DIR) and the last ones are also kept in memory.
+
+    Returns:
+    ------
+    the content of the PDB entry as a tuple of lines
+    """
+    path = os.path.join(PDB_CACHE_DIR, "%s.pdb"%pdb_id.upper())
+    try:
+        with open(path, encoding = 'ascii', errors = 'replace') as f:
+            return tuple(line.rstrip('\n') for line in f)
+    except FileNotFoundError:
+        pass
+    request = Request("http://www.rcsb.org/pdb/download/downloadFile.do?fileFormat=pdb&compression=NO&structureId=%s"%pdb_id, headers = {"Accept-Encoding": "gzip"})
+    with urlopen(request) as response:
+        stream = gzip.GzipFile(fileobj = response) if response.headers.get("Content-Encoding") == "gzip" else response
+        lines = tuple(line.decode('ascii', 'replace').rstrip('\r\n') for line in stream)
+    #an empty body or an error page is not cached
+    if any(line.startswith(("ATOM", "HETATM", "END")) for line in lines):
+        _store(path, lines)
+    return lines
+
+def _store(path, lines):
+    """
+    Write the lines of a downloaded entry into the cache. The file is written aside and then renamed, so that a concurrent reader never sees a partial entry. A cache that can't be written is silently ignored.
+    """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        fd, tmp_path = tempfile.mkstemp(dir = os.path.dirname(path), suffix = ".tmp")
+        try:
+            with open(fd, 'w', encoding = 'ascii', errors = 'replace') as f:
+                for line in lines:
+                    f.write(line)
+                    f.write('\n')
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass
+
+class PDB:
+    """
+    The Protein Database http://www.rcsb.org/
+    """
+
+    def get_entry(self, pdb_id):
+        """
+        Return the content of a PDB entry as a list of lines
+        """
+        return list(_fetch_pdb(pdb_id.upper()))
+
+    def get_entries(self, pdb_ids, max_workers = 8):
+        """
+        Return the contents of several PDB entries, downloaded concurrently
+
+        Parameters:
+        ---------
+        - pdb_ids: a list of PDB IDs
+        - max_workers (default: 8): the maximum number of entries downloaded at the same time
+
+        Returns:
+        ------
+        a generator of the contents of the entries (each one as a list of lines), in the order of pdb_ids
+        """
+        with ThreadPoolExecutor(max_workers = max_workers) as executor:
+            yield from executor.map(self.get_entry, pdb_ids)
 
 class PDBProviderParams(SecondaryStructureProviderParams):
 
@@ -36,12 +112,10 @@ class PDBProvider(SecondaryStructureProvider):
         """
         Return the content of a PDB entry as a list of lines
         """
-        response = urlopen("http://www.rcsb.org/pdb/download/downloadFile.do?fileFormat=pdb&compression=NO&structureId=%s"%pdb_id)
-        content = str(response.read())
-        return content.split("\\n")
+        return list(_fetch_pdb(pdb_id.upper()))
     
     def get_secondary_structure(self, params):
-        for ts in parse_pdb(self.get_entry(params.get_pdb_id())):
+        for ts in parse_pdb(self.get_entry(params.get_pdb_id()), chain_filter = {params.get_chain_name()}):
             if ts.rna.name == params.get_chain_name():
                 ss = SecondaryStructure(rna = ts.rna, base_pairs=ts.find_canonical_basepairs(chain_name = ts.rna.name))
                 return ss
@@ -1,6 +1,8 @@
-import re, math
-from itertools import groupby, product
-from operator import itemgetter
+import math
+from types import MappingProxyType
+from array import array
+from bisect import bisect_left, bisect_right
+from pyrna._kernels import RESIDUE_A, RESIDUE_U, RESIDUE_G, RESIDUE_C, NO_ROLE, DONOR, ACCEPTOR, scan_pairs
 
 class SecondaryStructureProviderParams:
     """
@@ -30,6 +32,8 @@ class Block:
     """
     A continuous range of molecular positions, with a single start and end point.
     """
+    __slots__ = ('start', 'end')
+
     def __init__(self, start, end):
         if start < end:
             self.start = start
@@ -50,36 +54,54 @@ class Location:
         - list the ranges of continuous positions as nested lists: Location(nested_lists=[[34,34], [56,58], [67,69]])
         """
         self.blocks = []
+        self._starts = [] #the start of each Block, to look for a position with a binary search
+        self._reach = [] #the largest end among the Block objects up to each one (the nested lists can overlap)
         if start and end:
             self.add_block(Block(start, end))
         elif single_positions:
-            single_positions.sort()
-            for k, g in groupby(enumerate(single_positions), lambda i,x:i-x):
-                _range = map(itemgetter(1), g)
-                self.blocks.append(Block(min(_range), max(_range)))
+            positions = sorted(set(single_positions))
+            start = positions[0]
+            for previous, position in zip(positions, positions[1:]):
+                if position != previous+1: #a breakpoint between two blocks
+                    self.blocks.append(Block(start, previous))
+                    start = position
+            self.blocks.append(Block(start, positions[-1]))
+            self._starts = [block.start for block in self.blocks]
+            self._update_reach(0)
         elif nested_lists:
             for nested_list in nested_lists:
                 self.blocks.append(Block(min(nested_list), max(nested_list)))
+            self.blocks.sort(key = lambda block: block.start) #the nested lists can be given in any order
+            self._starts = [block.start for block in self.blocks]
+            self._update_reach(0)
 
     def add_block(self, block):
-        blocks_to_remove = []
-
-        for _block in self.blocks:
-            if block.is_before(_block) and not block.is_beside(_block):
-                break
-            elif block.intersects(_block) or block.is_beside(_block):
-                block.merge(_block)
-                blocks_to_remove.append(_block)
-                #its necessary to continue to see if the new Block can merge with other blocks
-                continue
-            elif len(blocks_to_remove):
-                break
-
-        for block_to_remove in blocks_to_remove:
-            self.blocks.remove(block_to_remove)
-
-        self.blocks.append(block)
-        self.blocks = sorted(self.blocks, key=lambda block: block.start)
+        """
+        Add a Block to this Location. The Block is merged with the blocks it overlaps or is beside.
+        """
+        i = bisect_left(self._starts, block.start)
+        #the previous block can overlap or touch the new one
+        if i > 0 and self.blocks[i-1].end >= block.start-1:
+            i -= 1
+            block.start = self.blocks[i].start
+        #the new block can also absorb several of the following ones
+        j = i
+        while j < len(self.blocks) and self.blocks[j].start <= block.end+1:
+            block.end = max(block.end, self.blocks[j].end)
+            j += 1
+        self.blocks[i:j] = [block]
+        self._starts[i:j] = [block.start]
+        self._update_reach(i)
+
+    def _update_reach(self, i):
+        """
+        Recompute self._reach from the i-th Block
+        """
+        reach = self._reach[i-1] if i > 0 else None
+        del self._reach[i:]
+        for block in self.blocks[i:]:
+            reach = block.end if reach is None or block.end > reach else reach
+            self._reach.append(reach)
 
     def remove_location(self, location):
         """
@@ -115,10 +137,14 @@ class Location:
         ------
         all the single positions making this Location as a list.
         """
-        single_positions = []
+        return list(self.iter_positions())
+
+    def iter_positions(self):
+        """
+        Iterate over all the single positions making this Location, without building them as a list.
+        """
         for block in self.blocks:
-            single_positions += range(block.start, block.end+1)
-        return single_positions
+            yield from range(block.start, block.end+1)
 
     def has_position(self, position):
         """
@@ -127,7 +153,9 @@ class Location:
         ---------
         position: an integer
         """
-        return position in self.get_single_positions()
+        i = bisect_right(self._starts, position) - 1
+        #all the blocks up to the i-th start before the position, one of them encloses it if they reach it
+        return i >= 0 and self._reach[i] >= position
 
     def start(self):
         return self.blocks[0].start
@@ -156,11 +184,11 @@ class Molecule:
         return '\n'.join(lines)
 
     def __add__(self, seq):
-        if seq.__class__ == str:
-            self.sequence = ''.join([self.sequence, seq])
+        if isinstance(seq, str):
+            self.sequence += seq
 
     def __sub__(self, length):
-        if length.__class__ == int and length <= len(self.sequence):
+        if isinstance(length, int) and length <= len(self.sequence):
             self.sequence = self.sequence[0: len(self.sequence)-length]
 
     def __len__(self):
@@ -176,24 +204,32 @@ class Molecule:
         return self.sequence.__getitem__(i)
 
 
+#the gap characters are all converted to '-'
+_GAP = str.maketrans('._', '--')
+
+_WC_COMPLEMENT = str.maketrans({'A': 'U', 'C': 'G', 'G': 'C', 'U': 'A'})
+
 class RNA(Molecule):
     def __init__(self, sequence, name = 'rna'):
         Molecule.__init__(self, name)
 
-        for residue in list(sequence):
-            self.add_residue(residue)
+        residues = []
+        for residue in sequence:
+            canonical = modified_ribonucleotides.get(residue)
+            if canonical is not None:
+                self.modified_residues.append((residue, len(residues)+1))
+                residue = canonical
+            residues.append(residue)
+        self.sequence = ''.join(residues).translate(_GAP)
 
     def add_residue(self, residue):
-        if residue in modified_ribonucleotides:
+        canonical = modified_ribonucleotides.get(residue)
+        if canonical is not None:
             self.modified_residues.append((residue, len(self.sequence)+1))
-            residue = modified_ribonucleotides[residue]
-        if residue in ['A', 'U', 'G', 'C']:
-            self.sequence = ''.join([self.sequence, residue])
-        elif residue in ['.', '_', '-']:
-            self.sequence = ''.join([self.sequence, '-'])
-        else:
-            #print "Unknown residue "+residue
-            self.sequence = ''.join([self.sequence, residue])
+            residue = canonical
+        if residue in ['.', '_', '-']:
+            residue = '-'
+        self.sequence += residue
 
     def get_complement(self):
         """
@@ -201,13 +237,12 @@ class RNA(Molecule):
         ------
         the complement sequence as a string.
         """
-        basecomplement = {'A': 'U', 'C': 'G', 'G': 'C', 'U': 'A'}
-        letters = list(self.sequence)
-        letters = [basecomplement[base] if base in basecomplement else base for base in letters]
-        return ''.join(letters)
+        return self.sequence.translate(_WC_COMPLEMENT)
     
     
 class BasePair:
+    __slots__ = ('location', 'edge1', 'edge2', 'orientation')
+
     def __init__(self, pos1, pos2, edge1 = "WC", edge2 = "WC", orientation = "cis"):
         """
         Parameters:
@@ -270,209 +305,230 @@ class SecondaryStructure:
         if length >= 2 :
             self.helices.append(Helix("H"+str(len(self.helices)+1), helix_start, former_bp.location.end(), length))
 class Atom:
-    def __init__(self, name, x, y, z):
-        self.name = name
-        self.x = x
-        self.y = y
-        self.z = z
-
-    def __str__(self):
-        return self.name
+    """
+    The coordinates of an Atom are stored in a flat array (the x, y and z of each atom, one after the other), shared by all the atoms of a TertiaryStructure.
+    """
+    __slots__ = ('name', 'role', 'idx', '_coords')
 
-class EndocyclicA(Atom):
-    def __init__(self, name, x, y, z):
-        Atom.__init__(self,name, x, y, z)
+    def __init__(self, name, x, y, z, coords = None, role = NO_ROLE):
+        """
+        Parameters:
+        ---------
+        coords (default: None): the flat array storing the coordinates. If None, the Atom gets its own array.
+        role (default: NO_ROLE): the hydrogen bond role of this Atom (NO_ROLE, DONOR or ACCEPTOR)
+        """
+        self.name = name
+        self.role = role
+        if coords is None:
+            coords = array('d')
+        self.idx = len(coords)//3 #the index of this Atom in the coords array
+        coords.extend((x, y, z))
+        self._coords = coords
 
-    def __str__(self):
-        return self.name
+    @property
+    def x(self):
+        return self._coords[3*self.idx]
 
-class DonorEndoA(EndocyclicA):
-    def __init__(self, name, x, y, z):
-        EndocyclicA.__init__(self,name, x, y, z)
+    @x.setter
+    def x(self, value):
+        self._coords[3*self.idx] = value
 
-    def __str__(self):
-        return self.name
+    @property
+    def y(self):
+        return self._coords[3*self.idx+1]
 
-class AcceptorEndoA(EndocyclicA):
-    def __init__(self, name, x, y, z):
-        EndocyclicA.__init__(self,name, x, y, z)
+    @y.setter
+    def y(self, value):
+        self._coords[3*self.idx+1] = value
 
-    def __str__(self):
-        return self.name
+    @property
+    def z(self):
+        return self._coords[3*self.idx+2]
 
-class ExocyclicA(Atom):
-    def __init__(self, name, x, y, z):
-        Atom.__init__(self,name, x, y, z)
+    @z.setter
+    def z(self, value):
+        self._coords[3*self.idx+2] = value
 
     def __str__(self):
         return self.name
 
-class DonorExoA(ExocyclicA):
-    def __init__(self, name, x, y, z):
-        ExocyclicA.__init__(self,name, x, y, z)
+#the entry of the atoms missing from the _ATOM_TYPES tables
+_OTHER_ATOM = (NO_ROLE, False)
 
-    def __str__(self):
-        return self.name
-
-class AcceptorExoA:
-    def __init__(self, name, x, y, z):
-        ExocyclicA.__init__(self,name, x, y, z)
+class Residue3D:
+    __slots__ = ('atoms', 'donors', 'acceptors', 'wc_atoms', 'position', 'chain_name', '_coords')
 
-    def __str__(self):
-        return self.name
+    #atom name -> (hydrogen bond role, True if involved in the Watson-Crick edge), shared by all the residues of a given type
+    _ATOM_TYPES = {}
 
-class Residue3D:
-    def __init__(self, chain_name, position):
+    def __init__(self, chain_name, position, coords = None):
+        """
+        Parameters:
+        ---------
+        coords (default: None): the flat array storing the coordinates of the atoms (see Atom). If None, the residue gets its own array.
+        """
         self.atoms = [] #a list of Atom objects
+        self.donors = [] #the Atom objects from self.atoms that are hydrogen bond donors
+        self.acceptors = [] #the Atom objects from self.atoms that are hydrogen bond acceptors
+        self.wc_atoms = [] #the Atom objects from self.atoms involved in the Watson-Crick edge
         self.position = position
         self.chain_name = chain_name
+        self._coords = array('d') if coords is None else coords
 
     def add_atom(self, atom_name, coords):
-        self.atoms.append(Atom(atom_name, coords[0], coords[1], coords[2]))
+        role, wc = self._ATOM_TYPES.get(atom_name, _OTHER_ATOM)
+        atom = Atom(atom_name, coords[0], coords[1], coords[2], self._coords, role)
+        self.atoms.append(atom)
+        if role == DONOR:
+            self.donors.append(atom)
+        elif role == ACCEPTOR:
+            self.acceptors.append(atom)
+        if wc:
+            self.wc_atoms.append(atom)
     
     def get_WC_atoms(self):
-        return []
+        return self.wc_atoms
 
 class Guanine3D(Residue3D):
-    def __init__(self, chain_name, position):
-        Residue3D.__init__(self, chain_name, position)
+    __slots__ = ()
 
-    def add_atom(self, atom_name, coords):
-        match atom_name:
-            case "N1": self.atoms.append(DonorEndoA(atom_name, coords[0], coords[1], coords[2]))
-            case "N2": self.atoms.append(DonorExoA(atom_name, coords[0], coords[1], coords[2]))
-            case "N3": self.atoms.append(AcceptorEndoA(atom_name, coords[0], coords[1], coords[2]))
-            case "O6": self.atoms.append(AcceptorExoA(atom_name, coords[0], coords[1], coords[2]))
-            case "N7": self.atoms.append(AcceptorEndoA(atom_name, coords[0], coords[1], coords[2]))
-            case _: self.atoms.append(Atom(atom_name, coords[0], coords[1], coords[2]))
+    _ATOM_TYPES = {
+        "N1": (DONOR, True),
+        "N2": (DONOR, True),
+        "N3": (ACCEPTOR, False),
+        "O6": (ACCEPTOR, True),
+        "N7": (ACCEPTOR, False)
+    }
+
+    def __init__(self, chain_name, position, coords = None):
+        Residue3D.__init__(self, chain_name, position, coords)
 
-    def get_WC_atoms(self):
-        target_atom_names = ["N1", "N2", "O6"] 
-        return [a for a in self.atoms if a.name in target_atom_names]
-    
     def __str__(self):
         return "G"+str(self.position)
 
 class Adenine3D(Residue3D):
-    def __init__(self, chain_name, position):
-        Residue3D.__init__(self, chain_name, position)
+    __slots__ = ()
 
-    def add_atom(self, atom_name, coords):
-        match atom_name:
-            case "N1": self.atoms.append(AcceptorEndoA(atom_name, coords[0], coords[1], coords[2]))
-            case "N3": self.atoms.append(AcceptorEndoA(atom_name, coords[0], coords[1], coords[2]))
-            case "N6": self.atoms.append(DonorExoA(atom_name, coords[0], coords[1], coords[2]))
-            case "N7": self.atoms.append(AcceptorEndoA(atom_name, coords[0], coords[1], coords[2]))
-            case _: self.atoms.append(Atom(atom_name, coords[0], coords[1], coords[2]))
+    _ATOM_TYPES = {
+        "N1": (ACCEPTOR, True),
+        "N3": (ACCEPTOR, False),
+        "N6": (DONOR, True),
+        "N7": (ACCEPTOR, False)
+    }
 
-    def get_WC_atoms(self):
-        target_atom_names = ["N1", "N6"] 
-        return [a for a in self.atoms if a.name in target_atom_names]
+    def __init__(self, chain_name, position, coords = None):
+        Residue3D.__init__(self, chain_name, position, coords)
 
     def __str__(self):
         return "A"+str(self.position)
 
 class Uracil3D(Residue3D):
-    def __init__(self, chain_name, position):
-        Residue3D.__init__(self, chain_name, position)
+    __slots__ = ()
 
-    def add_atom(self, atom_name, coords):
-        match atom_name:
-            case "O2": self.atoms.append(AcceptorExoA(atom_name, coords[0], coords[1], coords[2]))
-            case "N3": self.atoms.append(DonorEndoA(atom_name, coords[0], coords[1], coords[2]))
-            case "O4": self.atoms.append(AcceptorExoA(atom_name, coords[0], coords[1], coords[2]))
-            case _: self.atoms.append(Atom(atom_name, coords[0], coords[1], coords[2]))
+    _ATOM_TYPES = {
+        "O2": (ACCEPTOR, True),
+        "N3": (DONOR, True),
+        "O4": (ACCEPTOR, True)
+    }
 
-    def get_WC_atoms(self):
-        target_atom_names = ["O2", "N3", "O4"] 
-        return [a for a in self.atoms if a.name in target_atom_names]
+    def __init__(self, chain_name, position, coords = None):
+        Residue3D.__init__(self, chain_name, position, coords)
 
     def __str__(self):
         return "U"+str(self.position)
 
 class Cytosine3D(Residue3D):
-    def __init__(self, chain_name, position):
-        Residue3D.__init__(self, chain_name, position)
+    __slots__ = ()
 
-    def add_atom(self, atom_name, coords):
-        match atom_name:
-            case "O2": self.atoms.append(AcceptorExoA(atom_name, coords[0], coords[1], coords[2]))
-            case "N3": self.atoms.append(AcceptorEndoA(atom_name, coords[0], coords[1], coords[2]))
-            case "N4": self.atoms.append(DonorExoA(atom_name, coords[0], coords[1], coords[2]))
-            case _: self.atoms.append(Atom(atom_name, coords[0], coords[1], coords[2]))
+    _ATOM_TYPES = {
+        "O2": (ACCEPTOR, True),
+        "N3": (ACCEPTOR, True),
+        "N4": (DONOR, True)
+    }
 
-    def get_WC_atoms(self):
-        target_atom_names = ["O2", "N3", "N4"]
-        return [a for a in self.atoms if a.name in target_atom_names]
+    def __init__(self, chain_name, position, coords = None):
+        Residue3D.__init__(self, chain_name, position, coords)
 
     def __str__(self):
         return "C"+str(self.position)
 
+#residue name -> (Residue3D class, residue type code)
+_RESIDUE_CLASSES = {
+    "A": (Adenine3D, RESIDUE_A),
+    "G": (Guanine3D, RESIDUE_G),
+    "U": (Uracil3D, RESIDUE_U),
+    "C": (Cytosine3D, RESIDUE_C)
+}
+
+def is_3D_residue(residue_name):
+    """
+    Test if a TertiaryStructure can be made with residues of this name (see TertiaryStructure.add_atom)
+    """
+    return residue_name in _RESIDUE_CLASSES
+
+#the phosphate oxygens are renamed with the old PDB nomenclature
+_PHOSPHATE_OXYGENS = {'OP1': 'O1P', 'OP2': 'O2P', 'OP3': 'O3P'}
+
+#maximal distance (in Angstroms) between a donor and an acceptor to make an hydrogen bond
+HBOND_DISTANCE = 3.0
+
 class TertiaryStructure:
 
     def __init__(self, rna):
         self.rna = rna
         self.name = "N.A."
         self.residues = [] #a list of Residue3D objects
+        self._coords = array('d') #the coordinates of all the atoms, shared by the residues (see Atom)
+        self._residue_types = array('b') #the residue type code of each residue in self.residues
 
     def add_atom(self, atom_name, residue_name, chain_name, absolute_position, coords):
-        atom_name = re.sub("\*", "'", atom_name)
-        if atom_name == 'OP1':
-            atom_name = 'O1P'
-        elif atom_name == 'OP2':
-            atom_name = 'O2P'
-        elif atom_name == 'OP3':
-            atom_name = 'O3P'
+        atom_name = atom_name.replace("*", "'")
+        atom_name = _PHOSPHATE_OXYGENS.get(atom_name, atom_name)
         if absolute_position-1 >= len(self.residues):
             self.rna.add_residue(residue_name)
-            match(residue_name):
-                case "A": self.residues.append(Adenine3D(chain_name, absolute_position))
-                case "G": self.residues.append(Guanine3D(chain_name, absolute_position))
-                case "U": self.residues.append(Uracil3D(chain_name, absolute_position))
-                case "C": self.residues.append(Cytosine3D(chain_name, absolute_position))
-                case _: raise RuntimeError("Unknown residue "+residue_name) 
+            residue_entry = _RESIDUE_CLASSES.get(residue_name)
+            if residue_entry is None:
+                raise RuntimeError("Unknown residue "+residue_name)
+            residue_class, residue_type = residue_entry
+            self.residues.append(residue_class(chain_name, absolute_position, self._coords))
+            self._residue_types.append(residue_type)
         self.residues[absolute_position-1].add_atom(atom_name,coords)
 
+    def _build_soa(self, chain_name):
+        """
+        Flatten the donor and acceptor atoms of a chain into parallel arrays (structure of arrays):
+        - self._xyz: the x, y and z coordinates of each atom, one after the other, gathered from the shared coordinates array
+        - self._res_idx: the index of the residue of each atom in self.residues
+        - self._res_type: the residue type code of each atom (RESIDUE_A, RESIDUE_U, RESIDUE_G or RESIDUE_C)
+        - self._role: the role of each atom (DONOR or ACCEPTOR)
+        """
+        self._xyz = array('d')
+        self._res_idx = array('i')
+        self._res_type = array('b')
+        self._role = array('b')
+        for i, res_type in enumerate(self._residue_types):
+            r = self.residues[i]
+            if r.chain_name != chain_name:
+                continue
+            for role, atoms in ((DONOR, r.donors), (ACCEPTOR, r.acceptors)):
+                for a in atoms:
+                    self._xyz.extend(a._coords[3*a.idx:3*a.idx+3])
+                    self._res_idx.append(i)
+                    self._res_type.append(res_type)
+                    self._role.append(role)
+
     """
     Return a list of BasePair objects
     """
     def find_canonical_basepairs(self, chain_name):
-        base_pairs = []
-        for i in range(0, len(self.residues)-1):
-            r = self.residues[i]
-            if r.chain_name == chain_name:
-                for j in range(i+1, len(self.residues)):
-                    next_r = self.residues[j]
-                    if next_r.chain_name == chain_name:
-                        match r :
-                            case Adenine3D():
-                                match next_r:
-                                    case Uracil3D(): 
-                                        if (compute_pairing(r, next_r)):
-                                            base_pairs.append(BasePair(r.position, next_r.position))
-
-                            case Guanine3D():
-                                match next_r:
-                                    case Cytosine3D():
-                                        if (compute_pairing(r, next_r)):
-                                            base_pairs.append(BasePair(r.position, next_r.position))
-                                    case Uracil3D(): 
-                                        if (compute_pairing(r, next_r)):
-                                            base_pairs.append(BasePair(r.position, next_r.position))
-                            case Uracil3D():
-                                match next_r:
-                                    case Guanine3D(): 
-                                        if (compute_pairing(r, next_r)):
-                                            base_pairs.append(BasePair(r.position, next_r.position))
-                                    case Adenine3D(): 
-                                        if (compute_pairing(r, next_r)):
-                                            base_pairs.append(BasePair(r.position, next_r.position))
-                            case Cytosine3D():
-                                match next_r:
-                                    case Guanine3D(): 
-                                        if (compute_pairing(r, next_r)):
-                                            base_pairs.append(BasePair(r.position, next_r.position))
-        return base_pairs         
+        self._build_soa(chain_name)
+        res_idx = self._res_idx
+        hbond_counts = {} #(residue index, residue index) -> number of hydrogen bonds
+        for i, j in scan_pairs(self._xyz, res_idx, self._res_type, self._role, HBOND_DISTANCE*HBOND_DISTANCE):
+            key = (res_idx[i], res_idx[j]) if res_idx[i] < res_idx[j] else (res_idx[j], res_idx[i])
+            hbond_counts[key] = hbond_counts.get(key, 0) + 1
+        #two residues are paired if they're making at least two hydrogen bonds
+        return [BasePair(self.residues[i].position, self.residues[j].position) for (i, j), count in sorted(hbond_counts.items()) if count >= 2]
 
 """
 Two residues are paired if they're making at least two hydrogen bonds
@@ -482,20 +538,16 @@ r2: a second instance of Residue3D
 def compute_pairing(r1, r2):
 
     hbond_count = 0
-
-    donors = [a for a in r1.atoms if isinstance(a, DonorEndoA) or isinstance(a, DonorExoA)]
-    acceptors = [a for a in r1.atoms if isinstance(a, AcceptorEndoA) or isinstance(a, AcceptorExoA)]
-    
-    acceptors_2 = [a for a in r2.atoms if isinstance(a, AcceptorEndoA) or isinstance(a, AcceptorExoA)]
-    hbonds = list(product(donors, acceptors_2))
-    for hbond in hbonds:
-        if atoms_distance(hbond[0],hbond[1]) <= 3.0:
-            hbond_count += 1
-    donors_2 = [a for a in r2.atoms if isinstance(a, DonorEndoA) or isinstance(a, DonorExoA)]
-    hbonds = list(product(acceptors, donors_2))
-    for hbond in hbonds:
-        if atoms_distance(hbond[0],hbond[1]) <= 3.0:
-            hbond_count += 1
+    cutoff2 = HBOND_DISTANCE*HBOND_DISTANCE
+
+    for donor in r1.donors:
+        for acceptor in r2.acceptors:
+            if atoms_squared_distance(donor, acceptor) <= cutoff2:
+                hbond_count += 1
+    for acceptor in r1.acceptors:
+        for donor in r2.donors:
+            if atoms_squared_distance(acceptor, donor) <= cutoff2:
+                hbond_count += 1
     return hbond_count >= 2
 
 """
@@ -503,8 +555,16 @@ Compute the 3D distance between two Atom objects
 """
 def atoms_distance(a1, a2):
     return math.dist([a1.x, a1.y, a1.z], [a2.x, a2.y, a2.z])
+
+"""
+Compute the squared 3D distance between two Atom objects. Cheaper than atoms_distance to compare a distance with a cutoff.
+"""
+def atoms_squared_distance(a1, a2):
+    dx, dy, dz = a1.x-a2.x, a1.y-a2.y, a1.z-a2.z
+    return dx*dx+dy*dy+dz*dz
             
-modified_ribonucleotides = {
+#modified residue name -> canonical residue name (read-only)
+modified_ribonucleotides = MappingProxyType({
     "T": "U",
     "PSU": "U",
     "I": "A",
@@ -933,4 +993,4 @@ modified_ribonucleotides = {
     "DC": "C",
     "P5P": "A",
     "FMU": "U"
-}
+})
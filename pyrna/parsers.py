@@ -1,5 +1,52 @@
-import re
-from pyrna.model import RNA, BasePair, TertiaryStructure, SecondaryStructure, SecondaryStructureProvider, SecondaryStructureProviderParams
+import re, io, os
+from xml.sax.saxutils import escape
+from pyrna.model import RNA, BasePair, TertiaryStructure, SecondaryStructure, SecondaryStructureProvider, SecondaryStructureProviderParams, is_3D_residue
+from pyrna._kernels import pair_brackets
+
+#removes the blanks from the sequence lines
+_STRIP_WS = str.maketrans('', '', ' \t\r\n')
+
+#the residues and atoms ignored by parse_pdb (water, ions, ligands,...)
+_SKIPPED_RESIDUES = frozenset({"FMN", "PRF", "HOH", "MG", "OHX", "MN", "ZN", "SO4", "CA", "UNK", "AMO"})
+_SKIPPED_ATOMS = frozenset({"MG", "K", "NA", "SR", "CL", "CD", "ACA"})
+
+_MULTISPACE = re.compile(' +')
+
+#an ATOM record produced by to_pdb
+_PDB_ATOM_LINE = "%-6s%5u  %-4s%3s %s%4u    %8.3f%8.3f%8.3f\n"
+
+#the templates of the RNAML data produced by to_rnaml
+_RNAML_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE rnaml SYSTEM "rnaml.dtd">
+<rnaml version="1.0">"""
+_RNAML_MOLECULE_START = """<molecule id="{id}">
+<identity>
+<name>{name}</name>
+</identity>
+<sequence>
+<seq-data>{sequence}</seq-data>
+</sequence>
+<structure>
+<model>
+<str-annotation>"""
+#filled with the %-operator, cheaper than str.format for each base pair
+_RNAML_BASE_PAIR = """<base-pair>
+<base-id-5p><base-id><position>%d</position></base-id></base-id-5p>
+<base-id-3p><base-id><position>%d</position></base-id></base-id-3p>
+<edge-5p>%s</edge-5p>
+<edge-3p>%s</edge-3p>
+<bond-orientation>%s</bond-orientation>
+</base-pair>"""
+_RNAML_MOLECULE_END = """</str-annotation>
+</model>
+</structure>
+</molecule>"""
+_RNAML_FOOTER = "</rnaml>"
+_RNAML_EDGES = {"WC": "W", "H": "H", "SE": "S"}
+_RNAML_ORIENTATIONS = {"cis": "c", "trans": "t"}
+
+#a line made with a bracket notation
+_BN_RE = re.compile(r'^[.(){}\[\]]+$')
 
 def to_pdb(tertiary_structure, location = None):
     """
@@ -14,25 +61,41 @@ def to_pdb(tertiary_structure, location = None):
     ------
     the PDB data as a String
     """
-    lines= []
-    i = 1
-    keys = []
+    buf = io.StringIO()
+    to_pdb_stream(tertiary_structure, buf, location)
+    return buf.getvalue()[:-1] #without the newline after END
 
-    for k in tertiary_structure.residues:
-        if location and location.has_position(k) or not location:
-            keys.append(k)
+def to_pdb_stream(tertiary_structure, out, location = None):
+    """
+    Write a TertiaryStructure object as PDB data into an opened file, line by line, without building the whole PDB data in memory
 
-    keys.sort() #the absolute position are sorted
+    Parameters:
+    -----------
+    - tertiary_structure: a TertiaryStructure object (see pyrna.model)
+    - out: a file opened for writing, in text mode or in binary mode (the lines are then encoded in ASCII). For large structures, open it with a large buffer (like buffering=1<<20)
+    - location (default: None): a Location object (see pyrna.model). Restrict the export to the atoms of the residues enclosed by this location.
+    """
+    write = out.write
+    if isinstance(out, (io.RawIOBase, io.BufferedIOBase)):
+        write = lambda line, _write=out.write: _write(line.encode('ascii'))
+    residues = tertiary_structure.residues
+    sequence = tertiary_structure.rna.sequence
+    chain = tertiary_structure.rna.name[0]
+    i = 1
+
+    #the absolute positions are sorted
+    keys = sorted(r.position for r in residues if location is None or location.has_position(r.position))
 
     for key in keys:
-        atoms = tertiary_structure.residues[key]['atoms']
-        for atom in atoms:
-            lines.append("%-6s%5u  %-4s%3s %s%4u    %8.3f%8.3f%8.3f"%("ATOM", i, atom['name'], tertiary_structure.rna.sequence[key-1], tertiary_structure.rna.name[0], key, atom['coords'][0], atom['coords'][1], atom['coords'][2]))
+        residue_name = sequence[key-1]
+        for atom in residues[key-1].atoms:
+            #read directly from the coordinates array of the Atom rather than through its x, y and z properties
+            coords = atom._coords
+            j = 3*atom.idx
+            write(_PDB_ATOM_LINE % ("ATOM", i, atom.name, residue_name, chain, key, coords[j], coords[j+1], coords[j+2]))
             i += 1
 
-    lines.append("END")
-
-    return '\n'.join(lines)
+    write("END\n")
 
 def to_fasta(molecules, single_line=False):
     """
@@ -47,11 +110,69 @@ def to_fasta(molecules, single_line=False):
     ------
     the FASTA data as a String
     """
-    outputs = []
+    buf = io.StringIO()
+    to_fasta_stream(molecules, buf, single_line)
+    return buf.getvalue()[:-1] #without the last newline
+
+def to_fasta_stream(molecules, out, single_line=False):
+    """
+    Write Molecule objects as FASTA data into an opened file, one molecule after the other
+
+    Parameters:
+    ---------
+    - molecules: an iterable over Molecule objects (see pyrna.model), like the generator returned by parse_pdb_sequences
+    - out: a file opened for writing, in text mode or in binary mode (like sys.stdout.buffer, the molecules are then encoded in UTF-8)
+    - single_line (default: False): if True, each molecular sequence will we exported into a single line
+    """
+    write = out.write
+    if isinstance(out, (io.RawIOBase, io.BufferedIOBase)):
+        write = lambda data, _write=out.write: _write(data.encode('utf-8'))
     for molecule in molecules:
-        outputs.append(molecule.to_fasta(single_line))
-    return '\n'.join(outputs)
+        write(molecule.to_fasta(single_line) + '\n')
+
+
+def to_rnaml(rnas, secondary_structures):
+    """
+    Convert RNA molecules and their secondary structures into RNAML data
+
+    Parameters:
+    ---------
+    - rnas: a list of RNA objects (see pyrna.model)
+    - secondary_structures: a list of secondary structures, one per RNA, each 2D described as a list of BasePair objects (like the ones returned by parse_vienna)
 
+    Returns:
+    ------
+    the RNAML data as a String
+    """
+    buf = io.StringIO()
+    to_rnaml_stream(zip(rnas, secondary_structures), buf)
+    return buf.getvalue()[:-1] #without the newline after the footer
+
+def to_rnaml_stream(records, out):
+    """
+    Write RNA molecules and their secondary structures as RNAML data into an opened file, one molecule after the other, without building the whole RNAML data in memory
+
+    Parameters:
+    ---------
+    - records: an iterable over tuples (RNA object, secondary structure described as a list of BasePair objects or as a list of tuples (pos1, pos2) for canonical base pairs), like the generator returned by parse_vienna_stream
+    - out: a file opened for writing in text mode
+    """
+    write = out.write
+    edge = _RNAML_EDGES.get
+    orientation = _RNAML_ORIENTATIONS.get
+    write(_RNAML_HEADER)
+    for i, (rna, base_pairs) in enumerate(records, 1):
+        parts = [_RNAML_MOLECULE_START.format(id = i, name = escape(rna.name or ""), sequence = rna.sequence)]
+        if base_pairs and isinstance(base_pairs[0], tuple):
+            parts += [_RNAML_BASE_PAIR % (pos1, pos2, 'W', 'W', 'c') for pos1, pos2 in base_pairs]
+        else:
+            parts += [_RNAML_BASE_PAIR % (bp.location.start(), bp.location.end(), edge(bp.edge1, '?'), edge(bp.edge2, '?'), orientation(bp.orientation, '?')) for bp in base_pairs]
+        parts.append(_RNAML_MOLECULE_END)
+        write('\n')
+        write('\n'.join(parts))
+    write('\n')
+    write(_RNAML_FOOTER)
+    write('\n')
 
 def parse_fasta(fasta_data):
     """
@@ -65,25 +186,33 @@ def parse_fasta(fasta_data):
     ------
     a list of RNA objects (according to the value of the parameter type) (see pyrna.model)
     """
-    molecules = []
+    return list(parse_fasta_stream(io.StringIO(fasta_data)))
+
+def parse_fasta_stream(handle):
+    """
+    Parse FASTA data line by line, without loading it fully in memory
+
+    Parameters:
+    ---------
+    - handle: an iterable over the lines of the Fasta data (an opened file for example)
+
+    Returns:
+    ------
+    a generator of RNA objects (see pyrna.model)
+    """
     pieces = []
     molecule_name = None
-    for line in fasta_data.split('\n'):
-        if re.match('>',line):
+    for line in handle:
+        if line.startswith('>'):
             if molecule_name and len(pieces) > 0:
-                m = RNA(sequence = ''.join(pieces), name = molecule_name.strip())
-                if m != None:
-                    molecules.append(m)
+                yield RNA(sequence = ''.join(pieces).translate(_STRIP_WS).upper(), name = molecule_name.strip())
             molecule_name = line[1:]
             pieces = []
         else:
-            pieces.append(line.strip().upper())
+            pieces.append(line)
     #last molecule
     if molecule_name and len(pieces) > 0:
-        m = RNA(sequence = ''.join(pieces), name = molecule_name.strip())
-        if m != None:
-            molecules.append(m)
-    return molecules
+        yield RNA(sequence = ''.join(pieces).translate(_STRIP_WS).upper(), name = molecule_name.strip())
 
 def parse_vienna(vienna_data):
     """
@@ -97,19 +226,37 @@ def parse_vienna(vienna_data):
     ------
     tuple containg a list of RNA objects and a list of secondary structures, each 2D described as a list of BasePair objects
     """
-    name = None
-    secondary_structures = []
     rnas = []
+    secondary_structures = []
+    for rna, base_pairs in parse_vienna_stream(io.StringIO(vienna_data)):
+        rnas.append(rna)
+        secondary_structures.append(base_pairs)
+    return rnas, secondary_structures
+
+def parse_vienna_stream(handle, as_pairs = False):
+    """
+    Parse Vienna data line by line, without loading it fully in memory
+
+    Parameters:
+    ---------
+     - handle: an iterable over the lines of the Vienna data (an opened file,...)
+     - as_pairs (default: False): if True, each secondary structure is described as a list of tuples (pos1, pos2) instead of BasePair objects. Much lighter when the base pairs are only written back (see to_rnaml_stream)
+
+    Returns:
+    ------
+    a generator of tuples (RNA object, secondary structure described as a list of BasePair objects), one per molecule. A molecule without bracket notation has an empty list of BasePair objects.
+    """
+    read_bn = pair_brackets if as_pairs else parse_bn
+    name = None
     current_bn = []
     current_sequence = []
-    for line in vienna_data.split('\n'):
-        if re.match('^[\.()\{\}\[\]]+$', line):
+    for line in handle:
+        line = line.rstrip('\r\n')
+        if _BN_RE.match(line):
             current_bn.append(line)
-        elif re.match('^>', line):
+        elif line.startswith('>'):
             if len(current_sequence):
-                rnas.append(RNA(name = name, sequence = ''.join(current_sequence)))
-                if len(current_bn):
-                    secondary_structures.append(parse_bn(''.join(current_bn)))
+                yield RNA(name = name, sequence = ''.join(current_sequence)), read_bn(''.join(current_bn))
             name = line[1:]
             current_bn = []
             current_sequence = []
@@ -118,10 +265,7 @@ def parse_vienna(vienna_data):
 
     #last one
     if len(current_sequence):
-        rnas.append(RNA(name = name, sequence = ''.join(current_sequence)))
-        if len(current_bn):
-            secondary_structures.append(parse_bn(''.join(current_bn)))
-    return rnas, secondary_structures
+        yield RNA(name = name, sequence = ''.join(current_sequence)), read_bn(''.join(current_bn))
 
 def parse_bn(bn):
     """
@@ -135,21 +279,7 @@ def parse_bn(bn):
     ------
     a list of base pairs
     """
-
-    i = 0
-    lastPairedPos = []
-    lastPairedSymbol = []
-    basePairs = []
-
-    for s in list(bn):
-        i+=1
-        if s in ['(','{','[']:
-            lastPairedPos.append(i)
-            lastPairedSymbol.append(s)
-        elif s in [')','}',']']:
-            basePairs.append(BasePair(lastPairedPos.pop(),i))
-
-    return basePairs
+    return [BasePair(i, j) for i, j in pair_brackets(bn)]
 
 class PDBFileProviderParams(SecondaryStructureProviderParams):
 
@@ -174,73 +304,190 @@ class PDBFileProvider(SecondaryStructureProvider):
         SecondaryStructureProvider.__init__(self)
 
     def get_secondary_structure(self, params):
-        with open(params.get_input_file()) as f: 
-            for ts in parse_pdb(f.readlines()):
-                if ts.rna.name == params.get_chain_name():
-                    ss = SecondaryStructure(rna = ts.rna, base_pairs=ts.find_canonical_basepairs(chain_name = ts.rna.name))
-                    return ss
-
-def parse_pdb(pdb_data):
+        """
+        The SecondaryStructure objects are cached per file, chain and modification time of the file: asking again for the same chain of an unchanged file returns the same object.
+        """
+        chain_name = params.get_chain_name()
+        return _file_secondary_structures(params.get_input_file(), [chain_name]).get(chain_name)
+
+    def get_secondary_structures(self, params, chain_names):
+        """
+        Return the SecondaryStructure objects of several chains, the PDB file being parsed only once for the chains not already cached (see get_secondary_structure)
+
+        Returns:
+        ------
+        a dict chain name -> SecondaryStructure object (the chains not found in the file are missing)
+        """
+        return _file_secondary_structures(params.get_input_file(), chain_names)
+
+#the SecondaryStructure objects computed by PDBFileProvider, from the least to the most recently used: (path, mtime_ns, chain name) -> SecondaryStructure
+_FILE_SECONDARY_STRUCTURES = {}
+_FILE_SECONDARY_STRUCTURES_SIZE = 64
+
+def _file_secondary_structures(input_file, chain_names):
+    """
+    The modification time of the file is part of the cache key: a modified file is parsed again
+    """
+    path = os.path.abspath(input_file)
+    mtime_ns = os.stat(path).st_mtime_ns
+    cache = _FILE_SECONDARY_STRUCTURES
+    found = {}
+    for chain_name in chain_names:
+        key = (path, mtime_ns, chain_name)
+        if key in cache:
+            found[chain_name] = cache[key] = cache.pop(key) #now the most recently used
+    missing = frozenset(chain_names).difference(found)
+    if missing:
+        pending = set(missing) #the chains still to be found
+        with open(path) as f:
+            for ts in parse_pdb(f, chain_filter = missing):
+                chain_name = ts.rna.name
+                if chain_name in found: #only the first TertiaryStructure of a chain is kept
+                    continue
+                found[chain_name] = cache[(path, mtime_ns, chain_name)] = SecondaryStructure(rna = ts.rna, base_pairs=ts.find_canonical_basepairs(chain_name = chain_name))
+                pending.discard(chain_name)
+                if not pending:
+                    break
+        while len(cache) > _FILE_SECONDARY_STRUCTURES_SIZE:
+            del cache[next(iter(cache))]
+    return {chain_name: found[chain_name] for chain_name in chain_names if chain_name in found}
+
+def parse_pdb(pdb_data, chain_filter = None):
     """
     Parse PDB data.
 
     Parameters:
     ---------
-     - pdb_data: the PDB data as a list of lines
+     - pdb_data: the PDB data as an iterable over its lines (a list of lines, an opened file,...)
+     - chain_filter (default: None): a set of chain names. If not None, the atoms of the other chains are skipped before being parsed.
 
     Returns:
     ------
-    a list of TertiaryStructure objects (see pyrna.model). if the PDB data describes a tertiary structure made with several molecular chains, this method will return one TertiaryStructure object per chain.
+    a generator of TertiaryStructure objects (see pyrna.model). if the PDB data describes a tertiary structure made with several molecular chains, this method will yield one TertiaryStructure object per chain, as soon as the chain is complete.
+    """
+    current_3D = None
+    add_atom = None #the add_atom method of current_3D
+    title_parts = ["N.A."]
+    title = None
+    title_length = 0 #the number of parts joined into title
+
+    for record in _read_pdb_atoms(pdb_data, chain_filter, title_parts):
+        if record is None: #a closed chain (see _read_pdb_atoms)
+            yield current_3D
+            current_3D = None
+            continue
+        chain_name, absolute_position, residue_name, atom_name, line = record
+        if current_3D is None or chain_name != current_3D.rna.name: #new chain
+            if current_3D is not None: #the previous chain is complete
+                yield current_3D
+            current_3D = TertiaryStructure(RNA(sequence="", name = chain_name))
+            if title_length != len(title_parts):
+                title = _MULTISPACE.sub(' ', ''.join(title_parts))
+                title_length = len(title_parts)
+            current_3D.title = title
+            add_atom = current_3D.add_atom
+
+        #float() ignores the blanks around the fixed-width coordinates
+        add_atom(atom_name, residue_name, chain_name, absolute_position, (float(line[30:38]), float(line[38:46]), float(line[46:54])))
+
+    #last chain (if not closed by a TER record)
+    if current_3D is not None:
+        yield current_3D
+
+def parse_pdb_sequences(pdb_data, chain_filter = None):
+    """
+    Parse only the RNA sequences described in PDB data. Much faster than parse_pdb when the 3D coordinates are not needed: the ATOM records are filtered like in parse_pdb, but no atom is built and no coordinate is parsed.
+
+    Parameters:
+    ---------
+     - pdb_data: the PDB data as an iterable over its lines (a list of lines, an opened file,...)
+     - chain_filter (default: None): a set of chain names. If not None, the atoms of the other chains are skipped.
+
+    Returns:
+    ------
+    a generator of RNA objects (see pyrna.model), one per chain, the same as the rna attribute of the TertiaryStructure objects yielded by parse_pdb
+    """
+    rna = None
+    current_position = 0
+
+    for record in _read_pdb_atoms(pdb_data, chain_filter):
+        if record is None: #a closed chain (see _read_pdb_atoms)
+            yield rna
+            rna = None
+            continue
+        chain_name, absolute_position, residue_name, atom_name, line = record
+        if rna is None or chain_name != rna.name: #new chain
+            if rna is not None:
+                yield rna
+            rna = RNA(sequence="", name = chain_name)
+            current_position = 0
+        if absolute_position != current_position: #new residue
+            if not is_3D_residue(residue_name):
+                raise RuntimeError("Unknown residue "+residue_name)
+            rna.add_residue(residue_name)
+            current_position = absolute_position
+
+    #last chain (if not closed by a TER record)
+    if rna is not None:
+        yield rna
+
+def _read_pdb_atoms(pdb_data, chain_filter = None, title_parts = None):
+    """
+    Read the ATOM and HETATM records kept by parse_pdb and parse_pdb_sequences. The residues and atoms listed in _SKIPPED_RESIDUES and _SKIPPED_ATOMS, and the atoms without chain name, are ignored.
+
+    Parameters:
+    ---------
+     - pdb_data: the PDB data as an iterable over its lines
+     - chain_filter (default: None): a set of chain names. If not None, the atoms of the other chains are skipped.
+     - title_parts (default: None): if not None, a list receiving the content of the TITLE records as they are read
+
+    Returns:
+    ------
+    a generator of tuples (chain name, absolute position of the residue starting at 1 for each chain, residue name, atom name, line). The residue name is the one of the first atom of the residue. None is yielded when a chain is closed by a TER record or by an atom of another chain skipped with chain_filter.
     """
-    molecules = []
-    chains = []
-    tertiary_structures = []
     current_chain = None
     current_residue_name = None
     current_residue_pos = None
-    absolute_position = -1
-    current_molecule = None
-    residues = []
-    current_3D = None
-    title = "N.A."
+    absolute_position = 0
 
     for line in pdb_data:
-        header = line[0:6].strip()
-        atom_name = line[12:16].strip()
-        residue_name = line[17:20].strip().upper()
-        chain_name = line[21:22].strip()
-        residue_pos = line[22:27].strip()
+        header = line[0:6]
+        if header == "ATOM  " or header == "HETATM":
+            if chain_filter is not None and line[21] not in chain_filter:
+                #the atoms of the other chains are not read, but like without filter, the one kept closes the current chain
+                if current_chain is not None and line[21:22].strip() and line[17:20].strip().upper() not in _SKIPPED_RESIDUES and line[12:16].strip() not in _SKIPPED_ATOMS:
+                    yield None
+                    current_chain = None
+                    current_residue_pos = None
+                continue
+            residue_name = line[17:20].strip().upper()
+            if residue_name in _SKIPPED_RESIDUES:
+                continue
+            atom_name = line[12:16].strip()
+            if atom_name in _SKIPPED_ATOMS:
+                continue
+            chain_name = line[21:22].strip()
+            if not chain_name:
+                continue
+            residue_pos = line[22:27] #only compared with the previous one, the fixed-width field doesn't need to be stripped
 
-        if (header == "ATOM" or header == "HETATM") and not residue_name in ["FMN","PRF","HOH","MG","OHX","MN","ZN", "SO4", "CA", "UNK", "AMO"] and not atom_name in ["MG","K", "NA", "SR", "CL", "CD", "ACA"] and len(chain_name):
             if chain_name != current_chain: #new chain
-                current_residue_name = residue_name
-                current_residue_pos = residue_pos
                 current_chain = chain_name
-                absolute_position = 1
-                residues = []
-                current_molecule = RNA(sequence="", name = current_chain)
-                residues.append(current_residue_name)
-                current_3D = TertiaryStructure(current_molecule)
-                current_3D.title = re.sub(' +', ' ', title)
-                tertiary_structures.append(current_3D)
-
-            elif current_residue_pos != residue_pos: # new residue
+                current_residue_pos = None
+                absolute_position = 0
+            if residue_pos != current_residue_pos: #new residue
                 current_residue_name = residue_name
                 current_residue_pos = residue_pos
                 absolute_position += 1
 
-            x = float(line[30:38].strip())
-            y = float(line[38:46].strip())
-            z = float(line[46:54].strip())
-            current_3D.add_atom(atom_name, current_residue_name, current_chain, absolute_position, [x,y,z])
+            yield current_chain, absolute_position, current_residue_name, atom_name, line
 
-        elif header == 'TITLE':
-            title += line[10:]
+        elif header.startswith("TITLE"):
+            if title_parts is not None:
+                title_parts.append(line[10:])
 
-        elif header == "TER":
+        elif header.startswith("TER"):
+            if current_chain is not None:
+                yield None
             current_chain = None
             current_residue_pos = None
-            current_molecule = None
-            residues = []
-
-    return tertiary_structures
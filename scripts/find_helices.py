@@ -4,12 +4,15 @@ This script takes as arguments the data source and a chain name.
 It prints the helices from the 2D infered from the 3D coordinates
 """
 
-import sys
+import sys, os, argparse
+import pyrna.db
 from pyrna.db import PDBProvider, PDBProviderParams
 from pyrna.parsers import parse_pdb, PDBFileProvider, PDBFileProviderParams
 from pyrna.model import SecondaryStructure
 
-def find_helices(pdb_id, chain_name):
+def find_helices(pdb_id, chain_name, out = None):
+    if out is None:
+        out = sys.stdout
     ss = None
     if "/" in pdb_id:
         params = PDBFileProviderParams()
@@ -22,15 +25,25 @@ def find_helices(pdb_id, chain_name):
         params.set_chain_name(chain_name)
         ss = PDBProvider().get_secondary_structure(params)
     else:
-        print("Data source unknown")
+        print("Data source unknown", file = sys.stderr)
     if ss:
+        lines = []
         for h in ss.helices:
-            print(f"{h.name}")
-            print(f"strand1 : {h.location.blocks[0].start}-{h.location.blocks[0].end}")
-            print(f"strand2 : {h.location.blocks[1].start}-{h.location.blocks[1].end}")
+            strand1, strand2 = h.location.blocks[0], h.location.blocks[1]
+            lines.append(f"{h.name}\nstrand1 : {strand1.start}-{strand1.end}\nstrand2 : {strand2.start}-{strand2.end}\n")
+        out.write(''.join(lines))
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: find_helices.py data_source chain_name (try for example: find_helices.py 1HR2 A)")
-        sys.exit()
-    find_helices(sys.argv[1], sys.argv[2])
\ No newline at end of file
+    parser = argparse.ArgumentParser(description = "Print the helices from the 2D infered from the 3D coordinates of an RNA chain")
+    parser.add_argument("data_source", help = "a PDB ID or the path of a PDB file (try for example: 1HR2)")
+    parser.add_argument("chain_name", help = "the name of the chain (try for example: A)")
+    parser.add_argument("-o", "--output", help = "the file to write (default: the standard output)")
+    parser.add_argument("--cache-dir", help = "the directory where PyRNA caches its downloads, the PDB entries going into its pdb subdirectory, like with the PYRNA_CACHE_DIR environment variable (default: %s)"%pyrna.db.CACHE_DIR)
+    args = parser.parse_args()
+    if args.cache_dir:
+        pyrna.db.PDB_CACHE_DIR = os.path.join(args.cache_dir, "pdb")
+    if args.output:
+        with open(args.output, 'w') as out:
+            find_helices(args.data_source, args.chain_name, out)
+    else:
+        find_helices(args.data_source, args.chain_name)
@@ -1,19 +1,31 @@
 #!/usr/bin/env python
 """
-This script takes as first argument a PDB ID, extracts the RNA sequences and prints them using the FASTA format
+This script takes as arguments one or several PDB IDs, extracts the RNA sequences and prints them using the FASTA format
 """
 
-import sys
+import sys, os, argparse
+import pyrna.db
 from pyrna.db import PDB
-from pyrna.parsers import parse_pdb, to_fasta
+from pyrna.parsers import parse_pdb_sequences, to_fasta_stream
 
-def fetch(pdb_id):
+def fetch(pdb_ids, out = None, jobs = 8):
+    if out is None:
+        out = sys.stdout.buffer
     pdb = PDB()
-    content = pdb.get_entry(pdb_id)
-    print(to_fasta([ts.rna for ts in parse_pdb(content)]))  
+    for content in pdb.get_entries(pdb_ids, max_workers = jobs): #the entries are downloaded concurrently
+        to_fasta_stream(parse_pdb_sequences(content), out)
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: pdb2_fasta.py PDB_ID (try for example: pdb2_fasta.py 1HR2)")
-        sys.exit()
-    fetch(sys.argv[1])
\ No newline at end of file
+    parser = argparse.ArgumentParser(description = "Extract the RNA sequences of PDB entries and print them using the FASTA format")
+    parser.add_argument("pdb_ids", nargs = "+", metavar = "PDB_ID", help = "a PDB ID (try for example: 1HR2)")
+    parser.add_argument("-o", "--output", help = "the FASTA file to write (default: the standard output)")
+    parser.add_argument("-j", "--jobs", type = int, default = 8, help = "the number of entries downloaded at the same time (default: 8)")
+    parser.add_argument("--cache-dir", help = "the directory where PyRNA caches its downloads, the PDB entries going into its pdb subdirectory, like with the PYRNA_CACHE_DIR environment variable (default: %s)"%pyrna.db.CACHE_DIR)
+    args = parser.parse_args()
+    if args.cache_dir:
+        pyrna.db.PDB_CACHE_DIR = os.path.join(args.cache_dir, "pdb")
+    if args.output:
+        with open(args.output, 'wb') as out:
+            fetch(args.pdb_ids, out, args.jobs)
+    else:
+        fetch(args.pdb_ids, jobs = args.jobs)
@@ -3,16 +3,22 @@
 This script takes as first argument a 2D structure described in a VIENNA file and prints it using the RNAML format
 """
 
-import sys, os
-from pyrna.parsers import parse_vienna, to_rnaml
+import sys, argparse
+from pyrna.parsers import parse_vienna_stream, to_rnaml_stream
 
-def convert(vienna_file):
-    with open(os.path.join(vienna_file)) as f:
-        rna, bps = parse_vienna(f.read())
-        print(to_rnaml(rna, bps)) 
+def convert(vienna_file, out = None):
+    if out is None:
+        out = sys.stdout
+    with open(vienna_file, encoding = 'utf-8', buffering = 1<<20) as f:
+        to_rnaml_stream(parse_vienna_stream(f, as_pairs = True), out)
             
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: vienna_to_rnaml.py vienna_file (try for example: ./vienna_to_rnaml.py ./data/sample.vienna)")
-        sys.exit()
-    convert(sys.argv[1])
\ No newline at end of file
+    parser = argparse.ArgumentParser(description = "Print a 2D structure described in a VIENNA file using the RNAML format")
+    parser.add_argument("vienna_file", help = "the VIENNA file (try for example: ./data/sample.vienna)")
+    parser.add_argument("-o", "--output", help = "the RNAML file to write (default: the standard output)")
+    args = parser.parse_args()
+    if args.output:
+        with open(args.output, 'w', encoding = 'utf-8') as out: #the encoding declared by the RNAML data
+            convert(args.vienna_file, out)
+    else:
+        convert(args.vienna_file)